@@ -1,11 +1,19 @@
+import os
 import setuptools
 
+ext_modules = []
+if os.getenv("ZENCHI_MYPYC"):
+    # optional: compile the ANIME parser to a C extension with mypyc.
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify(["zenchi/mappings/anime/__init__.py"])
+
 with open("README.md", "r") as fh:
     long_description = fh.read()
 
 setuptools.setup(
     name="zenchi",
-    packages=["zenchi", "zenchi.mappings"],
+    packages=["zenchi", "zenchi.mappings", "zenchi.mappings.anime"],
     version="1.2.0",
     license="MIT",
     description="python interface for communication with AniDB API",
@@ -16,7 +24,8 @@ setuptools.setup(
     url="https://github.com/fnzr/zenchi",
     download_url="https://github.com/fnzr/zenchi/archive/v1.2.0.tar.gz",
     keywords=["anime", "anidb", "udp api"],
-    install_requires=["pycryptodome"],
+    install_requires=["cryptography"],
+    ext_modules=ext_modules,
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
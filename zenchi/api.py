@@ -6,11 +6,14 @@ from typing import (
     Tuple,
     Union,
     Optional,
-    Iterator
+    Iterator,
+    List
 )
 import socket
 import logging
+from array import array
 from time import sleep
+from functools import lru_cache
 from zenchi import cache, settings
 from zenchi.settings import value_or_error
 import zenchi.mappings as mappings
@@ -38,6 +41,9 @@ PUBLIC_COMMANDS = ["PING", "ENCRYPT", "ENCODING", "AUTH", "VERSION"]
 _default_timeout = 5
 _timeout = _default_timeout
 
+_receive_buffer = bytearray(MAX_RECEIVE_SIZE)
+_receive_view = memoryview(_receive_buffer)
+
 
 def set_timeout(seconds: int) -> None:
     """Set time before raising a socket timeout error.
@@ -48,6 +54,48 @@ def set_timeout(seconds: int) -> None:
     """
     global _timeout
     _timeout = seconds
+    if _conn is not None:
+        _conn.settimeout(seconds)
+
+
+def _data_line(response: str) -> str:
+    """Get the line following the response code without splitting the whole response.
+
+    :param response: the full response sent by the server
+    :type response: str
+    :return: the second line of the response
+    :rtype: str
+    """
+    start = response.find("\n") + 1
+    end = response.find("\n", start)
+    return response[start:] if end == -1 else response[start:end]
+
+
+def _fields(response: str, maxsplit: int) -> List[str]:
+    """Split the data line of a response, stopping after the last expected field.
+
+    Fields added by newer API versions are left joined in one extra element, ignored by callers.
+
+    :param response: the full response sent by the server
+    :type response: str
+    :param maxsplit: number of separators in the data line, i.e. field count - 1
+    :type maxsplit: int
+    :return: the fields of the data line
+    :rtype: List[str]
+    """
+    return _data_line(response).split("|", maxsplit + 1)
+
+
+@lru_cache(maxsize=256)
+def _mask_hex(mask: int) -> str:
+    """Format an ANIME mask as sent to the server. Clients tend to reuse the same masks.
+
+    :param mask: the anime mask
+    :type mask: int
+    :return: 14 digits hexadecimal representation of the mask
+    :rtype: str
+    """
+    return format(mask, "014x")
 
 
 def _listen_incoming_packets() -> Iterator[bytes]:
@@ -56,16 +104,18 @@ def _listen_incoming_packets() -> Iterator[bytes]:
     :return: The raw data from the server.
     :rtype: Iterator[bytes]
     """
-    global _timeout
     s = get_socket()
     while True:
-        s.settimeout(_timeout)
-        yield s.recv(MAX_RECEIVE_SIZE)
+        size = s.recv_into(_receive_buffer, MAX_RECEIVE_SIZE)
+        yield bytes(_receive_view[:size])
     return b""
 
 
 def create_socket(
-    host: str = "", port: int = 14443, anidb_server: str = "", anidb_port: int = 0
+    host: str = "",
+    port: int = 14443,
+    anidb_server: str = "",
+    anidb_port: int = 0,
 ) -> socket.socket:
     """Create a socket to be use to communicate with the server.
 
@@ -73,7 +123,8 @@ def create_socket(
 
     :param host: local host to bind the socket to, defaults to "" (which I think is any. Read the docs.)
     :type host: str, optional
-    :param port: local port to bind the socket to, defaults to 14443
+    :param port: local port to bind the socket to, defaults to 14443.
+        AniDB ties a session to it, so each process needs its own.
     :type port: int, optional
     :param anidb_server: aniDB server name, defaults to environment ANIDB_SERVER
     :type anidb_server: str, optional
@@ -84,6 +135,7 @@ def create_socket(
     """
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.settimeout(_timeout)
     s.bind((host, port))
     anidb_server = value_or_error("ANIDB_SERVER", anidb_server)
     anidb_port = value_or_error("ANIDB_PORT", anidb_port)
@@ -131,62 +183,63 @@ def send(
     :return: a tuple (data, code). See docs of specific commands for details.
     :rtype: EndpointResult
     """
-    if command not in PUBLIC_COMMANDS:
-        if _session:
-            args["s"] = _session
-        else:
-            raise ValueError(
-                "Trying to send a command that requires a session without calling auth() first"
-            )
-    socket = get_socket()
-    message = "&".join([f"{key}={value}" for key, value in args.items()])
-    data = f"{command} {message}"
-    logger.info("Sending %s", data)
-
     global _encryptedsession
-    if _encryptedsession:
-        packet = crypto.encrypt(data, _encoding)
-    else:
-        packet = data.encode(_encoding)
-    socket.send(packet)
-    raw_response = next(_listen_incoming_packets())
+    while True:
+        if command not in PUBLIC_COMMANDS:
+            if _session:
+                args["s"] = _session
+            else:
+                raise ValueError(
+                    "Trying to send a command that requires a session without calling auth() first"
+                )
+        socket = get_socket()
+        message = "&".join([f"{key}={value}" for key, value in args.items()])
+        data = f"{command} {message}"
+        logger.info("Sending %s", data)
 
-    if _encryptedsession:
-        api_response = crypto.decrypt(raw_response, _encoding)
-    else:
-        api_response = raw_response.decode(_encoding)
-    logger.debug(api_response)
-
-    code = int(api_response[:3])
-    result = callback(code, api_response)
-    if result is not None:
-        return result, code
-    if code == 505:
-        raise errors.IllegalParameterError
-    if code == 598:
-        raise errors.IllegalCommandError
-    if code == 555:
-        raise errors.BannedError(api_response.splitlines()[1])
-    if code == 502:
-        raise errors.InvalidCredentialsError
-    if code in (600, 601, 602):
-        raise errors.ServerUnavailableError(code)
-    if code == 501:
-        logger.info("501 LOGIN FIRST. Sending auth and retrying.")
-        auth()
-        return send(command, args, callback)
-    if code == 506:
-        if "s" in args:
-            logger.info("506 INVALID SESSION. Sending auth and retying")
-            auth()
-            return send(command, args, callback)
+        if _encryptedsession:
+            packet = crypto.encrypt(data, _encoding)
         else:
-            raise errors.InvalidSessionError
-    if code == 604:
-        logger.info("[%d] Server timeout. Delaying and resending.", code)
-        sleep(5)
-        return send(command, args, callback)
-    raise errors.UnhandledResponseError(api_response)
+            packet = data.encode(_encoding)
+        socket.send(packet)
+        raw_response = next(_listen_incoming_packets())
+
+        if _encryptedsession:
+            api_response = crypto.decrypt(raw_response, _encoding)
+        else:
+            api_response = raw_response.decode(_encoding)
+        logger.debug(api_response)
+
+        code = int(api_response[:3])
+        result = callback(code, api_response)
+        if result is not None:
+            return result, code
+        if code == 505:
+            raise errors.IllegalParameterError
+        if code == 598:
+            raise errors.IllegalCommandError
+        if code == 555:
+            raise errors.BannedError(_data_line(api_response))
+        if code == 502:
+            raise errors.InvalidCredentialsError
+        if code in (600, 601, 602):
+            raise errors.ServerUnavailableError(code)
+        if code == 501:
+            logger.info("501 LOGIN FIRST. Sending auth and retrying.")
+            auth()
+            continue
+        if code == 506:
+            if "s" in args:
+                logger.info("506 INVALID SESSION. Sending auth and retying")
+                auth()
+                continue
+            else:
+                raise errors.InvalidSessionError
+        if code == 604:
+            logger.info("[%d] Server timeout. Delaying and resending.", code)
+            sleep(5)
+            continue
+        raise errors.UnhandledResponseError(api_response)
 
 
 def restore_session(session: str, enc: str = 'UTF8') -> EndpointResult:
@@ -314,7 +367,7 @@ def encrypt(username: str = "", api_key: str = "", type: int = 1) -> EndpointRes
             :message str: the reason why the command failed.
     :rtype: EndpointResult
     """
-    api_key = value_or_error("ENCRYPT_API_KEY", api_key)
+    api_key = value_or_error("ANIDB_ENCRYPT_API_KEY", api_key)
     username = value_or_error("ANIDB_USERNAME", username)
 
     def cb(code: int, response: str) -> Optional[EndpointDict]:
@@ -411,7 +464,7 @@ def anime(
         filtered_mask = mappings.anime.filter_cached(amask, aid)
     else:
         filtered_mask = amask
-    data: PacketParameters = dict(amask=format(filtered_mask, "014x"))
+    data: PacketParameters = dict(amask=_mask_hex(filtered_mask))
     if aid:
         if filtered_mask == 0:
             restored = cache.restore(command, aid)
@@ -433,10 +486,14 @@ def anime(
         if code == 330:
             return dict(message=response_message[code])
         if code == 230:
-            content = response.splitlines()[1]
-            result = mappings.anime.parse_response(amask, content)
+            content = _data_line(response)
+            result = mappings.anime.parse_response(filtered_mask, content)
             if aid:
-                return cache.update(command, aid, result)
+                # bits filtered out were already cached, even if the entry has no mask yet.
+                present = mappings.anime.present_mask(result) | (amask & ~filtered_mask)
+                return cache.update(
+                    command, aid, result, {mappings.anime.MASK_FIELD: present}
+                )
             else:
                 return result
         return None
@@ -469,7 +526,7 @@ def animedesc(aid: int, part: int, use_cache: bool = True) -> EndpointResult:
         if code in (330, 330):
             return dict(message=response_message[code])
         if code == 233:
-            parts = response.splitlines()[1].split("|")
+            parts = _fields(response, 2)
             result = {
                 "current_part": int(parts[0]),
                 "max_parts": int(parts[1]),
@@ -520,15 +577,16 @@ def character(charid: int, use_cache: bool = True) -> EndpointResult:
         if code == 335:
             return dict(message=response_message[code])
         if code == 235:
-            data = response.splitlines()[1].split("|")
+            to_int = int
+            data = _fields(response, 8)
             result = {
-                "charid": int(data[0]),
+                "charid": to_int(data[0]),
                 "name_kanji": data[1],
                 "name_transcription": data[2],
                 "pic": data[3],
                 "episode_list": int_list(data[5]),
-                "last_updated_date": int(data[6]),
-                "type": int(data[7]),
+                "last_updated_date": to_int(data[6]),
+                "type": to_int(data[7]),
                 "gender": data[8],
             }
             blocks = []
@@ -537,9 +595,9 @@ def character(charid: int, use_cache: bool = True) -> EndpointResult:
                 parts = block.split(",")
                 blocks.append(
                     {
-                        "anime_id": int(parts[0]),
-                        "appearance": int(parts[1]),
-                        "creator_id": int(parts[2]),
+                        "anime_id": to_int(parts[0]),
+                        "appearance": to_int(parts[1]),
+                        "creator_id": to_int(parts[2]),
                         "is_main_seyuu": bool(parts[3]) if parts[3] else None,
                     }
                 )
@@ -553,20 +611,28 @@ def character(charid: int, use_cache: bool = True) -> EndpointResult:
     return entry, 235
 
 
-def calendar() -> EndpointResult:
+def calendar(as_arrays: bool = False) -> EndpointResult:
     """Retrieve recently aired and upcoming shows.
 
     See https://wiki.anidb.net/w/UDP_API_Definition#CALENDAR:_Get_Upcoming_Titles
 
+    :param as_arrays: return one typed array per column instead of a list of dictionaries.
+        Compact and cheap to scan, or to hand over to numpy with numpy.frombuffer.
+        Defaults to False
+    :type as_arrays: bool, optional
     :return: a tuple (data, code). data is a dictionary with the keys:
         if code == 397:
             :message str: CALENDAR EMPTY
-        if code == 297:
+        if code == 297 and not as_arrays:
             :calendar List[Dictionary]:
         Each calendar entry has the following keys:
             :aid int:
             :startdate int:
             :dateflags int:
+        if code == 297 and as_arrays:
+            :aid array.array: signed 64 bits
+            :startdate array.array: signed 64 bits
+            :dateflags array.array: signed 32 bits
     :rtype: EndpointResult
     """
 
@@ -575,9 +641,19 @@ def calendar() -> EndpointResult:
             return dict(message=response_message[code])
         if code == 297:
             lines = response.splitlines()[1:]
+            if as_arrays:
+                aids = array("q")
+                startdates = array("q")
+                dateflags = array("i")
+                for line in lines:
+                    parts = line.split("|", 3)
+                    aids.append(int(parts[0]))
+                    startdates.append(int(parts[1]))
+                    dateflags.append(int(parts[2]))
+                return dict(aid=aids, startdate=startdates, dateflags=dateflags)
             result = []
             for line in lines:
-                parts = line.split("|")
+                parts = line.split("|", 3)
                 result.append(
                     {
                         "aid": int(parts[0]),
@@ -620,18 +696,19 @@ def creator(creatorid: int, use_cache: bool = True) -> EndpointResult:
         if code == 345:
             return dict(message=response_message[code])
         if code == 245:
-            parts = response.splitlines()[1].split("|")
+            to_int = int
+            parts = _fields(response, 9)
             result = {
-                "creatorid": int(parts[0]),
+                "creatorid": to_int(parts[0]),
                 "creator_name_kanji": parts[1],
                 "creator_name_transcription": parts[2],
-                "type": int(parts[3]),
+                "type": to_int(parts[3]),
                 "pic_name": parts[4],
                 "url_english": parts[5],
                 "url_japanese": parts[6],
                 "wiki_url_english": parts[7],
                 "wiki_url_japanese": parts[8],
-                "last_update_date": int(parts[9]),
+                "last_update_date": to_int(parts[9]),
             }
             cache.update(command, creatorid, result)
             return result
@@ -702,20 +779,21 @@ def episode(
         if code == 340:
             return dict(message=response_message[code])
         if code == 240:
-            parts = response.splitlines()[1].split("|")
+            to_int = int
+            parts = _fields(response, 10)
             result: Dict[str, Union[str, int]] = {
-                "eid": int(parts[0]),
-                "aid": int(parts[1]),
-                "length": int(parts[2]),
-                "rating": int(parts[3]),
-                "votes": int(parts[4]),
+                "eid": to_int(parts[0]),
+                "aid": to_int(parts[1]),
+                "length": to_int(parts[2]),
+                "rating": to_int(parts[3]),
+                "votes": to_int(parts[4]),
                 "epno": parts[5],
                 "eng": parts[6],
                 "romaji": parts[7],
                 "kanji": parts[8],
-                "aired": int(parts[9]),
-                "type": int(parts[10]),
-                "episode_number": int(parts[5][1:]),
+                "aired": to_int(parts[9]),
+                "type": to_int(parts[10]),
+                "episode_number": to_int(parts[5][1:]),
             }
 
             cache.update(command, result["eid"], result)
@@ -764,7 +842,7 @@ def updated(age: int = 0, time: int = 0, entity: int = 1) -> EndpointResult:
         if code == 343:
             return dict(message=response_message[code])
         if code == 243:
-            parts = response.splitlines()[1].split("|")
+            parts = _fields(response, 3)
             return {
                 "entity": int(parts[0]),
                 "total_count": int(parts[1]),
@@ -823,7 +901,7 @@ def group(gid: int = 0, gname: str = "", use_cache: bool = True) -> EndpointResu
         if code == 350:
             return dict(message=response_message[code])
         if code == 250:
-            parts = response.splitlines()[1].split("|")
+            parts = _fields(response, 16)
             result: Dict[str, Any] = {
                 "gid": int(parts[0]),
                 "rating": int(parts[1]),
@@ -884,7 +962,7 @@ def groupstatus(aid: int, state: int = 0) -> EndpointResult:
             groups_data = response.splitlines()[1:]
             truncated = False
             for group_data in groups_data:
-                parts = group_data.split("|")
+                parts = group_data.split("|", 7)
                 if len(parts) < 7:
                     logger.warning(
                         "Response was truncated, too much data for UDP packet."
@@ -2,35 +2,180 @@
 
 Really, I just dump it on the database.
 """
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union
+import atexit
+import copy
 import logging
-from datetime import datetime
+import threading
+from collections import OrderedDict
+import time
 import zenchi.settings as settings
 
 logger = logging.getLogger(__name__)
-try:
-    import pymongo
-except ImportError:
-    logger.warn(
-        "Module pymongo could not be found. Proceeding without cache. This is highly unadvised."
-    )
 
+# imported by setup, so users without a cache never load the driver.
+pymongo: Any = None
 _db: Any = None
+_client: Any = None
+_client_uri = ""
+_setup_lock = threading.Lock()
 MAX_SERVER_DELAY = 5000
+MAX_POOL_SIZE = 32
+MIN_POOL_SIZE = 4
+
+# restore() is also called with criteria instead of _id, see api. Index those fields.
+INDEXES: Dict[str, List[List[Tuple[str, int]]]] = {
+    "EPISODE": [[("eid", 1)], [("aid", 1), ("epno", 1)]],
+    "GROUP": [[("gid", 1)]],
+}
+MAX_MEMORY_ENTRIES = 4096
+
+# bookkeeping fields, only returned when asked for by restore. See mappings.anime.
+HIDDEN_FIELDS = ("_mask",)
+_WHOLE_DOCUMENT: Dict[str, int] = dict(_id=0, **{field: 0 for field in HIDDEN_FIELDS})
+
+# (collection, id or sorted criteria, sorted fields or None for whole documents).
+_Key = Tuple[str, Hashable, Optional[Tuple[str, ...]]]
+
+# least recently used first. Holds decoded documents, or None for known misses, so hot
+# entries skip both the round-trip and the BSON decoding. Callers only get copies.
+_memory: "OrderedDict[_Key, Optional[Dict[str, Any]]]" = OrderedDict()
+_MISSING = object()
+# memory keys other than whole documents by id, so updates can drop them. Indexed by
+# (collection, id) for partial documents, and (collection, None) for lookups by criteria.
+_derived_keys: Dict[Tuple[str, Hashable], Set[_Key]] = {}
+# guards _memory and _derived_keys, cache functions may be called from many threads.
+_memory_lock = threading.Lock()
+
+# Collection objects of the current database, to skip building one per operation.
+_collections: Dict[str, Any] = {}
+
+
+def _memory_key(
+    collection: str,
+    id: Union[str, int, Dict[str, Any]],
+    fields: Optional[Tuple[str, ...]] = None,
+) -> _Key:
+    if isinstance(id, dict):
+        return collection, tuple(sorted(id.items())), fields
+    return collection, id, fields
+
+
+def _owner(key: _Key) -> Optional[Tuple[str, Hashable]]:
+    if isinstance(key[1], tuple):
+        return key[0], None
+    if key[2] is not None:
+        return key[0], key[1]
+    return None
+
+
+def _remember(key: _Key, entry: Optional[Dict[str, Any]]) -> None:
+    with _memory_lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        owner = _owner(key)
+        if owner is not None:
+            _derived_keys.setdefault(owner, set()).add(key)
+        if len(_memory) > MAX_MEMORY_ENTRIES:
+            oldest, _ = _memory.popitem(last=False)
+            owner = _owner(oldest)
+            if owner is not None and owner in _derived_keys:
+                _derived_keys[owner].discard(oldest)
+
+
+def invalidate(collection: str, id: Union[str, int]) -> None:
+    """Drop an entry from process memory, so it is read from the database again.
+
+    Needed by anything that writes to the database without going through update.
+
+    :param collection: The collection of the entry. Same name as API commands.
+    :type collection: str
+    :param id: The unique identifier of the entry.
+    :type id: Union[str, int]
+    :rtype: None
+    """
+    with _memory_lock:
+        _memory.pop(_memory_key(collection, id), None)
+        for key in _derived_keys.pop((collection, id), ()):
+            _memory.pop(key, None)
+        # lookups by criteria may match the updated document, so they can't be trusted either.
+        for key in _derived_keys.pop((collection, None), ()):
+            _memory.pop(key, None)
+
+
+def _collection(name: str) -> Any:
+    collection = _collections.get(name)
+    if collection is None:
+        collection = _collections[name] = _db[name]
+    return collection
 
 
 def _get_connection() -> Any:
-    global _db
     if _db is None:
-        _db = setup()
+        _setup_once()
     return _db
 
 
+def _setup_once(uri: str = "", database: str = "anidb_cache") -> None:
+    with _setup_lock:
+        if _db is None:
+            setup(uri, database)
+
+
+def setup_in_background(
+    uri: str = "", database: str = "anidb_cache"
+) -> threading.Thread:
+    """Connect to mongo database in a daemon thread, keeping the handshake off the first request.
+
+    Cache operations issued before it finishes wait for it instead of connecting again.
+
+    :param uri: connection URI, defaults to environment MONGODB_URI
+    :type uri: str, optional
+    :param database: database name, defaults to 'anidb_cache'
+    :type database: str, optional
+    :return: the started thread
+    :rtype: threading.Thread
+    """
+    thread = threading.Thread(target=_setup_once, args=(uri, database), daemon=True)
+    thread.start()
+    return thread
+
+
+def get_client() -> Any:
+    """Get the MongoClient used by the cache, so other code can share its connection pool.
+
+    :return: the client if connected, otherwise None
+    :rtype: Any
+    """
+    _get_connection()
+    return _client
+
+
+def _close_client() -> None:
+    global _client, _client_uri
+    if _client is not None:
+        _client.close()
+    _client, _client_uri = None, ""
+
+
+atexit.register(_close_client)
+
+
+def _create_indexes(db: Any) -> None:
+    try:
+        for collection, indexes in INDEXES.items():
+            for keys in indexes:
+                db[collection].create_index(keys)
+    except pymongo.errors.OperationFailure as e:
+        logger.warn("Could not create cache indexes: %s", e)
+
+
 def setup(uri: str = "", database: str = "anidb_cache") -> Any:
     """Create connection to mongo database.
 
     Will send an warning if the connection is not successfull, but will proceed just fine.
     You really should use some kind of cache though.
+    Calling it again with the same uri reuses the existing client and its connection pool.
 
     :param uri: connection URI, defaults to environment MONGODB_URI
     :type uri: str, optional
@@ -39,28 +184,53 @@ def setup(uri: str = "", database: str = "anidb_cache") -> Any:
     :return: database connection if connected, otheriwse False
     :rtype: Any
     """
-    global _db
+    global _db, _client, _client_uri, pymongo
+    try:
+        import pymongo
+    except ImportError:
+        logger.warn(
+            "Module pymongo could not be found. Proceeding without cache. This is highly unadvised."
+        )
+        _db = False
+        return _db
     mongo_uri = settings.value_or_error("MONGODB_URI", uri)
+    with _memory_lock:
+        _memory.clear()
+        _derived_keys.clear()
+    _collections.clear()
+    if _client_uri != mongo_uri:
+        _close_client()
+    client = None
     try:
+        if _client is not None:
+            _db = _client[database]
+            _create_indexes(_db)
+            return _db
         client = pymongo.MongoClient(
-            mongo_uri, serverSelectionTimeoutMS=MAX_SERVER_DELAY
+            mongo_uri,
+            maxPoolSize=MAX_POOL_SIZE,
+            minPoolSize=MIN_POOL_SIZE,
+            serverSelectionTimeoutMS=MAX_SERVER_DELAY,
+            connect=False,
         )
         client.admin.command("ismaster")
         _db = client[database]
-    except NameError:
-        # caused by calling setup without pymongo installed.
-        # warning already issued above, so this can be ignored.
-        _db = False
+        _create_indexes(_db)
+        _client, _client_uri = client, mongo_uri
     except (pymongo.errors.ConnectionFailure, pymongo.errors.ConfigurationError):
         logger.warn(
             "Could not connect to cache database. Proceeding without cache. This is highly unadvised."
         )
+        if client is not None:
+            client.close()
         _db = False
     return _db
 
 
 def restore(
-    collection: str, id: Union[str, int, Dict[str, Any]]
+    collection: str,
+    id: Union[str, int, Dict[str, Any]],
+    fields: Optional[Iterable[str]] = None,
 ) -> Optional[Dict[str, Any]]:
     """Restrieve cached data from database.
 
@@ -68,19 +238,48 @@ def restore(
     :type collection: str
     :param id: The unique identifier for a particular collection. This varies by command.
     :type id: Union[str, int]
+    :param fields: retrieve only these fields of the entry, defaults to all of them.
+    :type fields: Optional[Iterable[str]]
     :return: The retrieved data if exists, else None.
     :rtype: Optional[Dict[str, Any]]
     """
     db = _get_connection()
     if not db:
         return None
-    if not isinstance(id, dict):
-        id = dict(_id=id)
-    return db[collection].find_one(id, dict(_id=0))  # type: ignore
+    if fields is not None:
+        fields = tuple(sorted(fields))
+    key = _memory_key(collection, id)
+    with _memory_lock:
+        entry: Any = _memory.get(key, _MISSING)
+        if fields is not None and (
+            entry is _MISSING or not set(HIDDEN_FIELDS).isdisjoint(fields)
+        ):
+            # partial documents are remembered apart, by the fields they hold.
+            key = _memory_key(collection, id, fields)
+            entry = _memory.get(key, _MISSING)
+        if entry is not _MISSING:
+            _memory.move_to_end(key)
+    if entry is _MISSING:
+        criteria = id if isinstance(id, dict) else dict(_id=id)
+        projection: Dict[str, int] = dict(_WHOLE_DOCUMENT)
+        if key[2] is not None:
+            projection = dict(_id=0)
+            projection.update((field, 1) for field in key[2])
+        entry = _collection(collection).find_one(criteria, projection)
+        _remember(key, entry)
+    if entry is None:
+        return None
+    if fields is not None:
+        entry = {field: entry[field] for field in fields if field in entry}
+    # nested lists and documents would otherwise be shared with the memory.
+    return copy.deepcopy(entry)  # type: ignore
 
 
 def update(
-    collection: str, id: Union[str, int], data: Dict[str, Any]
+    collection: str,
+    id: Union[str, int],
+    data: Dict[str, Any],
+    bits: Optional[Dict[str, int]] = None,
 ) -> Dict[str, Any]:
     """Create and/or update data in database.
 
@@ -90,6 +289,8 @@ def update(
     :type id: Union[str, int]
     :param data: The data to be added into the database. There's no safety checking here, pump and dump.
     :type data: Dict[str, Any]
+    :param bits: integer fields to be OR-ed with their stored value, instead of replaced.
+    :type bits: Optional[Dict[str, int]]
     :return: The created/updated entry. If there's no connection to the cache, returns data.
     :rtype: Dict[str, Any]
     """
@@ -97,6 +298,43 @@ def update(
     db = _get_connection()
     if not db:
         return data
-    data["updated_at"] = datetime.now()
-    db[collection].update_one(dict(_id=id), {"$set": data}, upsert=True)
-    return restore(collection, id)  # type: ignore
+    data["updated_at"] = int(time.time())
+    operation: Dict[str, Any] = {"$set": data}
+    if bits:
+        operation["$bit"] = {field: {"or": value} for field, value in bits.items()}
+    entry = _collection(collection).find_one_and_update(
+        dict(_id=id),
+        operation,
+        _WHOLE_DOCUMENT,
+        upsert=True,
+        return_document=pymongo.ReturnDocument.AFTER,
+    )
+    invalidate(collection, id)
+    _remember(_memory_key(collection, id), entry)
+    return copy.deepcopy(entry)
+
+
+def bulk_update(
+    collection: str, items: Iterable[Tuple[Union[str, int], Dict[str, Any]]]
+) -> None:
+    """Create and/or update many entries of a collection in a single round-trip.
+
+    :param collection: The collection to be retrieved. Same name as API commands.
+    :type collection: str
+    :param items: (id, data) pairs, as they would be sent to update.
+    :type items: Iterable[Tuple[Union[str, int], Dict[str, Any]]]
+    :rtype: None
+    """
+    db = _get_connection()
+    if not db:
+        return
+    now = int(time.time())
+    operations = []
+    for id, data in items:
+        data["updated_at"] = now
+        operations.append(
+            pymongo.UpdateOne(dict(_id=id), {"$set": data}, upsert=True)
+        )
+        invalidate(collection, id)
+    if operations:
+        _collection(collection).bulk_write(operations, ordered=False)
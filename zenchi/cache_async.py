@@ -0,0 +1,191 @@
+"""Same "cache" as zenchi.cache, but awaitable.
+
+Uses motor, so many entries can be read concurrently over the same connection pool.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Union
+import asyncio
+import atexit
+import logging
+import time
+import zenchi.settings as settings
+import zenchi.cache as cache
+
+logger = logging.getLogger(__name__)
+
+# imported by setup, like in zenchi.cache.
+pymongo: Any = None
+_db: Any = None
+_client: Any = None
+_client_uri = ""
+_setup_lock: Optional[asyncio.Lock] = None
+# the client and lock above belong to this event loop.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_WHOLE_DOCUMENT: Dict[str, int] = dict(
+    _id=0, **{field: 0 for field in cache.HIDDEN_FIELDS}
+)
+
+
+async def _get_connection() -> Any:
+    global _setup_lock
+    _check_loop()
+    if _db is None:
+        if _setup_lock is None:
+            _setup_lock = asyncio.Lock()
+        async with _setup_lock:
+            if _db is None:
+                await setup()
+    return _db
+
+
+def _close_client() -> None:
+    global _client, _client_uri
+    if _client is not None:
+        _client.close()
+    _client, _client_uri = None, ""
+
+
+atexit.register(_close_client)
+
+
+def _check_loop() -> None:
+    """Drop the client and lock of a previous event loop, they can't be used from another."""
+    global _db, _setup_lock, _loop
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        _close_client()
+        _db, _setup_lock, _loop = None, None, loop
+
+
+async def _create_indexes(db: Any) -> None:
+    try:
+        for collection, indexes in cache.INDEXES.items():
+            for keys in indexes:
+                await db[collection].create_index(keys)
+    except pymongo.errors.OperationFailure as e:
+        logger.warn("Could not create cache indexes: %s", e)
+
+
+async def setup(uri: str = "", database: str = "anidb_cache") -> Any:
+    """Create asynchronous connection to mongo database.
+
+    Will send an warning if the connection is not successfull, but will proceed just fine.
+    Calling it again with the same uri and event loop reuses the existing client and its
+    connection pool.
+
+    :param uri: connection URI, defaults to environment MONGODB_URI
+    :type uri: str, optional
+    :param database: database name, defaults to 'anidb_cache'
+    :type database: str, optional
+    :return: database connection if connected, otheriwse False
+    :rtype: Any
+    """
+    global _db, _client, _client_uri, pymongo
+    try:
+        import motor.motor_asyncio
+        import pymongo
+    except ImportError:
+        logger.warn(
+            "Module motor could not be found. Proceeding without async cache."
+        )
+        _db = False
+        return _db
+    mongo_uri = settings.value_or_error("MONGODB_URI", uri)
+    _check_loop()
+    if _client_uri != mongo_uri:
+        _close_client()
+    client = None
+    try:
+        if _client is not None:
+            _db = _client[database]
+            await _create_indexes(_db)
+            return _db
+        client = motor.motor_asyncio.AsyncIOMotorClient(
+            mongo_uri,
+            maxPoolSize=cache.MAX_POOL_SIZE,
+            minPoolSize=cache.MIN_POOL_SIZE,
+            serverSelectionTimeoutMS=cache.MAX_SERVER_DELAY,
+        )
+        await client.admin.command("ismaster")
+        _db = client[database]
+        await _create_indexes(_db)
+        _client, _client_uri = client, mongo_uri
+    except (pymongo.errors.ConnectionFailure, pymongo.errors.ConfigurationError):
+        logger.warn(
+            "Could not connect to cache database. Proceeding without async cache."
+        )
+        if client is not None:
+            client.close()
+        _db = False
+    return _db
+
+
+async def restore(
+    collection: str, id: Union[str, int, Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Restrieve cached data from database.
+
+    :param collection: The collection to be retrieved. Same name as API commands.
+    :type collection: str
+    :param id: The unique identifier for a particular collection. This varies by command.
+    :type id: Union[str, int]
+    :return: The retrieved data if exists, else None.
+    :rtype: Optional[Dict[str, Any]]
+    """
+    db = await _get_connection()
+    if not db:
+        return None
+    criteria = id if isinstance(id, dict) else dict(_id=id)
+    return await db[collection].find_one(criteria, _WHOLE_DOCUMENT)  # type: ignore
+
+
+async def restore_many(
+    collection: str, ids: Iterable[Union[str, int, Dict[str, Any]]]
+) -> List[Optional[Dict[str, Any]]]:
+    """Restrieve many entries of a collection concurrently.
+
+    :param collection: The collection to be retrieved. Same name as API commands.
+    :type collection: str
+    :param ids: The unique identifiers, see restore.
+    :type ids: Iterable[Union[str, int, Dict[str, Any]]]
+    :return: The retrieved data for each id, in the same order. None where it doesn't exist.
+    :rtype: List[Optional[Dict[str, Any]]]
+    """
+    return list(await asyncio.gather(*(restore(collection, id) for id in ids)))
+
+
+async def update(
+    collection: str,
+    id: Union[str, int],
+    data: Dict[str, Any],
+    bits: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """Create and/or update data in database.
+
+    :param collection: The collection to be retrieved. Same name as API commands.
+    :type collection: str
+    :param id: The unique identifier for a particular collection. This varies by command.
+    :type id: Union[str, int]
+    :param data: The data to be added into the database. There's no safety checking here, pump and dump.
+    :type data: Dict[str, Any]
+    :param bits: integer fields to be OR-ed with their stored value, instead of replaced.
+    :type bits: Optional[Dict[str, int]]
+    :return: The created/updated entry. If there's no connection to the cache, returns data.
+    :rtype: Dict[str, Any]
+    """
+    db = await _get_connection()
+    if not db:
+        return data
+    data["updated_at"] = int(time.time())
+    operation: Dict[str, Any] = {"$set": data}
+    if bits:
+        operation["$bit"] = {field: {"or": value} for field, value in bits.items()}
+    entry = await db[collection].find_one_and_update(
+        dict(_id=id),
+        operation,
+        _WHOLE_DOCUMENT,
+        upsert=True,
+        return_document=pymongo.ReturnDocument.AFTER,
+    )
+    # the synchronous cache may be holding the previous version in memory.
+    cache.invalidate(collection, id)
+    return entry  # type: ignore
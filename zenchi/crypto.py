@@ -3,35 +3,111 @@
 Thanks https://github.com/adameste/anidbcli
 """
 from typing import Any
-from Crypto.Cipher import AES
+from functools import lru_cache
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 import hashlib
+import sys
 
 BS = 16
+# padding for every possible length, indexed by that length.
+_PADS = tuple(bytes([length]) * length for length in range(BS + 1))
 
 
-def pad(s: str) -> str:
-    """Pad string with PKCS5Padding scheme.
+def pad(s: bytes) -> bytes:
+    """Pad bytes with PKCS5Padding scheme.
 
-    :param s: string to be padded
-    :type s: str
-    :return: padded string
-    :rtype: str
+    Padding is applied after encoding, so the block size is counted in bytes
+    even for multi-byte encodings.
+
+    :param s: bytes to be padded
+    :type s: bytes
+    :return: padded bytes
+    :rtype: bytes
     """
-    return s + (BS - len(s) % BS) * chr(BS - len(s) % BS)
+    return s + _PADS[BS - len(s) % BS]
 
 
-def unpad(s: str) -> str:
-    """Unpad string.
+def unpad(s: bytes) -> bytes:
+    """Unpad bytes.
 
-    :param s: string to be unpadded
-    :type s: str
-    :return: unpadded string
-    :rtype: str
+    :param s: bytes to be unpadded
+    :type s: bytes
+    :return: unpadded bytes
+    :rtype: bytes
+    """
+    return s[0: -s[-1]]
+
+
+def _md5(data: bytes) -> bytes:
+    if sys.version_info >= (3, 9):
+        # only derives a key, so OpenSSL can skip the FIPS checks.
+        return hashlib.md5(data, usedforsecurity=False).digest()
+    return hashlib.md5(data).digest()
+
+
+@lru_cache(maxsize=8)
+def _cipher(key: str) -> Any:
+    return Cipher(
+        algorithms.AES(_md5(bytes(key, "ascii"))),
+        modes.ECB(),
+        backend=default_backend(),
+    )
+
+
+class Crypto:
+    """Encryption of a single session.
+
+    ECB keeps no state between blocks and every message is block aligned, so one context
+    per direction serves the whole session without ever being finalized.
+    Separate sessions should use separate instances.
     """
-    return s[0: -ord(s[-1])]
+
+    def __init__(self, key: str) -> None:
+        """Generate aes contexts with given key.
+
+        The cipher is backed by OpenSSL, which uses AES-NI when the CPU supports it.
+        A recent key reuses the cipher instead of deriving it again.
+
+        :param key: api_key of user plus provided salt from ENCRYPT command
+        :type key: str
+        """
+        self.cipher = _cipher(key)
+        self._encrypt = self.cipher.encryptor().update
+        self._decrypt = self.cipher.decryptor().update
+
+    def encrypt(self, message: str, encoding: str) -> bytes:
+        """Encrypt message to be sent to server.
+
+        :param message: message to be encrypted.
+        :type message: str
+        :param encoding:
+        :type message: str
+        :return: encrypted message to be sent
+        :rtype: bytes
+        """
+        return self._encrypt(pad(message.encode(encoding)))  # type: ignore
+
+    def decrypt(self, message: bytes, encoding: str) -> str:
+        """Decrypt message received from server.
+
+        :param message: message to be decrypted.
+        :type message: bytes
+        :param encoding:
+        :type message: str
+        :raises ValueError: raised if message is not a multiple of the block size.
+        :return: decrypted message
+        :rtype: str
+        """
+        if len(message) % BS:
+            # a partial block would stay buffered in the decryptor.
+            raise ValueError("Encrypted message is not a multiple of the block size")
+        return unpad(self._decrypt(message)).decode(encoding)
 
 
 aes: Any = None
+# used by the module level functions below.
+_default: Any = None
 
 
 def setup(key: str) -> None:
@@ -41,9 +117,9 @@ def setup(key: str) -> None:
     :type key: str
     :rtype: None
     """
-    global aes
-    md5 = hashlib.md5(bytes(key, "ascii"))
-    aes = AES.new(md5.digest(), AES.MODE_ECB)
+    global aes, _default
+    _default = Crypto(key)
+    aes = _default.cipher
 
 
 def encrypt(message: str, encoding: str) -> bytes:
@@ -56,10 +132,7 @@ def encrypt(message: str, encoding: str) -> bytes:
     :return: encrypted message to be sent
     :rtype: bytes
     """
-    global aes
-    message = pad(message)
-    bytes_message = bytes(message, encoding)
-    return aes.encrypt(bytes_message)  # type: ignore
+    return _default.encrypt(message, encoding)  # type: ignore
 
 
 def decrypt(message: bytes, encoding: str) -> str:
@@ -69,10 +142,8 @@ def decrypt(message: bytes, encoding: str) -> str:
     :type message: bytes
     :param encoding:
     :type message: str
+    :raises ValueError: raised if message is not a multiple of the block size.
     :return: decrypted message
     :rtype: str
     """
-    global aes
-    plain_bytes = aes.decrypt(message)
-    padded_plain = plain_bytes.decode(encoding)
-    return unpad(padded_plain)
+    return _default.decrypt(message, encoding)  # type: ignore
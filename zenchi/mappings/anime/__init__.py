@@ -2,8 +2,9 @@
 
 Used in https://wiki.anidb.net/w/UDP_API_Definition#ANIME:_Retrieve_Anime_Data
 """
-from typing import Tuple, Dict, Callable, Any, Optional
+from typing import Tuple, Dict, Callable, Any, Optional, List
 import logging
+from functools import lru_cache
 from zenchi.mappings import int_list, str_list, to_bool
 import zenchi.cache as cache
 from . import mask as amask
@@ -60,6 +61,47 @@ lookup: Dict[int, Tuple[str, Callable[[str], Any]]] = {
     amask.parody_count: ("parody_count", int),
 }
 
+# (text, function) where function is None for str fields, since parts already are str.
+_Field = Tuple[str, Optional[Callable[[str], Any]]]
+_fields: Dict[int, _Field] = {
+    bit: (text, None if function is str else function)
+    for bit, (text, function) in lookup.items()
+}
+
+# fields set in every possible value of each mask byte, lowest bit first.
+# Indexed by byte, from the least significant one, then by its value.
+_by_byte: Tuple[Tuple[Tuple[_Field, ...], ...], ...] = tuple(
+    tuple(
+        tuple(
+            _fields[1 << (index * 8 + position)]
+            for position in range(8)
+            if value >> position & 1 and 1 << (index * 8 + position) in _fields
+        )
+        for value in range(256)
+    )
+    for index in range(7)
+)
+
+# cached entries keep the mask of their fields under this key, see api.anime.
+# zenchi.cache only returns it when asked for, see cache.HIDDEN_FIELDS.
+MASK_FIELD = "_mask"
+_bit_by_text: Dict[str, int] = {text: bit for bit, (text, _) in lookup.items()}
+
+
+@lru_cache(maxsize=256)
+def _plan(input: int) -> Tuple[_Field, ...]:
+    """Get the (text, function) of every field requested by a mask.
+
+    Ordered from the lowest set bit, matching the response fields from right to left.
+    Each byte of the mask is looked up at once, skipping the ones without set bits.
+    Clients tend to reuse the same masks, so even that usually happens once.
+    """
+    plan: List[_Field] = []
+    for byte, fields in zip(input.to_bytes(7, "little"), _by_byte):
+        if byte:
+            plan.extend(fields[byte])
+    return tuple(plan)
+
 
 def parse_response(input: int, response: str) -> Dict[str, Any]:
     """Parse API response to ANIME command into a dictionary.
@@ -71,18 +113,38 @@ def parse_response(input: int, response: str) -> Dict[str, Any]:
     :return: A variable key dictionary matching what was requested in the mask.
     :rtype: Dict[str, Any]
     """
-    result = dict()
     parts = response.split("|")
-    part_index = -1
-    for i in range(56):
-        index = input & (1 << i)
-        if index != 0:
-            text, function = lookup[index]
-            result[text] = function(parts[part_index])
-            if part_index + len(parts) == 0:
-                break
-            part_index -= 1
-    return result
+    return {
+        text: part if function is None else function(part)
+        for (text, function), part in zip(_plan(input), reversed(parts))
+    }
+
+
+def parse_responses(input: int, responses: List[str]) -> List[Dict[str, Any]]:
+    """Parse many API responses to ANIME commands sent with the same mask.
+
+    Every field is converted for all responses at once, column by column.
+
+    :param input: mask used to send the commands
+    :type input: int
+    :param responses: strings sent as response to the commands
+    :type responses: List[str]
+    :return: one dictionary per response, as returned by parse_response.
+    :rtype: List[Dict[str, Any]]
+    """
+    rows = [response.split("|") for response in responses]
+    width = len(rows[0]) if rows else 0
+    if any(len(row) != width for row in rows):
+        # truncated responses don't line up in columns.
+        return [parse_response(input, response) for response in responses]
+    results: List[Dict[str, Any]] = [dict() for _ in rows]
+    for offset, (text, function) in enumerate(_plan(input)[:width]):
+        index = width - 1 - offset
+        column = [row[index] for row in rows]
+        values = column if function is None else map(function, column)
+        for result, value in zip(results, values):
+            result[text] = value
+    return results
 
 
 def filter_cached(input: int, aid: int) -> int:
@@ -97,13 +159,27 @@ def filter_cached(input: int, aid: int) -> int:
     """
     if not aid:
         return input
-    entry = cache.restore("ANIME", aid)
+    entry = cache.restore("ANIME", aid, [MASK_FIELD])
     if entry is None:
         return input
-    for i in range(56):
-        mask = input & (1 << i)
-        if mask != 0:
-            text, _ = lookup[mask]
-            if text in entry:
-                input &= ~mask
-    return input
+    if MASK_FIELD not in entry:
+        # cached before the mask was stored, check the fields themselves.
+        entry = cache.restore("ANIME", aid, [text for text, _ in _plan(input)])
+        if entry is None:
+            return input
+        return input & ~present_mask(entry)
+    return input & ~entry[MASK_FIELD]  # type: ignore
+
+
+def present_mask(entry: Dict[str, Any]) -> int:
+    """Get the mask matching the ANIME fields present in a dictionary.
+
+    :param entry: parsed or cached anime data
+    :type entry: Dict[str, Any]
+    :return: mask with the bit of every known field in entry set.
+    :rtype: int
+    """
+    mask = 0
+    for text in entry:
+        mask |= _bit_by_text.get(text, 0)
+    return mask
@@ -1,53 +1,53 @@
 # byte 1
-aid = 1 << 7 << 48
-date_flags = 1 << 6 << 48
-year = 1 << 5 << 48
-type = 1 << 4 << 48
-related_aid_list = 1 << 3 << 48
-related_aid_type = 1 << 2 << 48
+aid = 0x80000000000000
+date_flags = 0x40000000000000
+year = 0x20000000000000
+type = 0x10000000000000
+related_aid_list = 0x08000000000000
+related_aid_type = 0x04000000000000
 
 # byte 2
-romaji_name = 1 << 7 << 40
-kanji_name = 1 << 6 << 40
-english_name = 1 << 5 << 40
-other_name = 1 << 4 << 40
-short_name = 1 << 3 << 40
-synonym_list = 1 << 2 << 40
+romaji_name = 0x00800000000000
+kanji_name = 0x00400000000000
+english_name = 0x00200000000000
+other_name = 0x00100000000000
+short_name = 0x00080000000000
+synonym_list = 0x00040000000000
 
 # byte 3
-episodes = 1 << 7 << 32
-highest_episode_number = 1 << 6 << 32
-special_ep_count = 1 << 5 << 32
-air_date = 1 << 4 << 32
-end_date = 1 << 3 << 32
-url = 1 << 2 << 32
-picname = 1 << 1 << 32
+episodes = 0x00008000000000
+highest_episode_number = 0x00004000000000
+special_ep_count = 0x00002000000000
+air_date = 0x00001000000000
+end_date = 0x00000800000000
+url = 0x00000400000000
+picname = 0x00000200000000
 
 # byte 4
-rating = 1 << 7 << 24
-vote_count = 1 << 6 << 24
-temp_rating = 1 << 5 << 24
-temp_vote = 1 << 4 << 24
-averate_view_rating = 1 << 3 << 24
-review_count = 1 << 2 << 24
-award_list = 1 << 1 << 24
-is_18_restricted = 1 << 24
+rating = 0x00000080000000
+vote_count = 0x00000040000000
+temp_rating = 0x00000020000000
+temp_vote = 0x00000010000000
+averate_view_rating = 0x00000008000000
+review_count = 0x00000004000000
+award_list = 0x00000002000000
+is_18_restricted = 0x00000001000000
 
 # byte 5
-ann_id = 1 << 6 << 16
-allcinema_id = 1 << 5 << 16
-anime_nfo_id = 1 << 4 << 16
-tag_name_list = 1 << 3 << 16
-tag_id_list = 1 << 2 << 16
-tag_weight_list = 1 << 1 << 16
-date_record_updated = 1 << 16
+ann_id = 0x00000000400000
+allcinema_id = 0x00000000200000
+anime_nfo_id = 0x00000000100000
+tag_name_list = 0x00000000080000
+tag_id_list = 0x00000000040000
+tag_weight_list = 0x00000000020000
+date_record_updated = 0x00000000010000
 
 # byte 6
-character_id_list = 1 << 7 << 8
+character_id_list = 0x00000000008000
 
 # byte 7
-specials_count = 1 << 7
-credits_count = 1 << 6
-other_count = 1 << 5
-trailer_count = 1 << 4
-parody_count = 1 << 3
+specials_count = 0x00000000000080
+credits_count = 0x00000000000040
+other_count = 0x00000000000020
+trailer_count = 0x00000000000010
+parody_count = 0x00000000000008
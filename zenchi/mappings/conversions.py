@@ -21,10 +21,7 @@ def int_list(data: str) -> List[int]:
     :return: List. of int.
     :rtype: List[int]
     """
-    listed = str_list(data)
-    if listed[0]:
-        return list(map(lambda x: int(x), listed))
-    return []
+    return [int(x) for x in data.split(",") if x]
 
 
 def to_bool(data: str) -> bool:
@@ -35,4 +32,4 @@ def to_bool(data: str) -> bool:
     :return: Take a guess.
     :rtype: bool
     """
-    return True if data == "1" else False
+    return data == "1"
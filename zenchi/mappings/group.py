@@ -16,9 +16,10 @@ def parse_relations(group_relations: str) -> List[Tuple[int, int]]:
     :return: list of (other group id, relation type) tuples
     :rtype: List[Tuple[int, int]]
     """
-    relations = group_relations.split("'")
     result = []
-    for relation in relations:
-        parts = relation.split(",")
-        result.append((int(parts[0]), int(parts[1])))
+    rest = group_relations
+    while rest:
+        relation, _, rest = rest.partition("'")
+        gid, _, relation_type = relation.partition(",")
+        result.append((int(gid), int(relation_type)))
     return result
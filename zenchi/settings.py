@@ -1,23 +1,54 @@
 """Settings dump."""
-import sys
 import os
-from typing import TypeVar
+from typing import Any, Dict, NamedTuple, TypeVar
 
 T = TypeVar("T")
-this = sys.modules[__name__]
 
-ANIDB_SERVER = os.getenv("ANIDB_SERVER", "")
-ANIDB_PORT = int(os.getenv("ANIDB_PORT", 0))
 
-ANIDB_USERNAME = os.getenv("ANIDB_USERNAME", "")
-ANIDB_PASSWORD = os.getenv("ANIDB_PASSWORD", "")
+class Settings(NamedTuple):
+    """Values of the environment variables, named after them in lower case."""
 
-ANIDB_ENCRYPT_API_KEY = os.getenv("ANIDB_ENCRYPT_API_KEY", "")
+    anidb_server: str = ""
+    anidb_port: int = 0
+    anidb_username: str = ""
+    anidb_password: str = ""
+    anidb_encrypt_api_key: str = ""
+    zenchi_clientname: str = ""
+    zenchi_clientversion: str = ""
+    mongodb_uri: str = "mongodb://localhost:27017"
 
-ZENCHI_CLIENTNAME = os.getenv("ZENCHI_CLIENTNAME", "")
-ZENCHI_CLIENTVERSION = os.getenv("ZENCHI_CLIENTVERSION", "")
 
-MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+def _read_environ() -> Settings:
+    """Read every setting from a single snapshot of the environment.
+
+    :return: the settings, with defaults where a variable is not set.
+    :rtype: Settings
+    """
+    environ = dict(os.environ)
+    defaults = Settings()
+    values: Dict[str, Any] = {}
+    for name, default in zip(Settings._fields, defaults):
+        env_name = name.upper()
+        if env_name in environ:
+            value = environ[env_name]
+            values[name] = int(value) if isinstance(default, int) else value
+    return defaults._replace(**values)
+
+
+SETTINGS = _read_environ()
+
+ANIDB_SERVER = SETTINGS.anidb_server
+ANIDB_PORT = SETTINGS.anidb_port
+
+ANIDB_USERNAME = SETTINGS.anidb_username
+ANIDB_PASSWORD = SETTINGS.anidb_password
+
+ANIDB_ENCRYPT_API_KEY = SETTINGS.anidb_encrypt_api_key
+
+ZENCHI_CLIENTNAME = SETTINGS.zenchi_clientname
+ZENCHI_CLIENTVERSION = SETTINGS.zenchi_clientversion
+
+MONGODB_URI = SETTINGS.mongodb_uri
 
 
 def value_or_error(env_name: str, value: T) -> T:
@@ -35,7 +66,8 @@ def value_or_error(env_name: str, value: T) -> T:
     """
     if value:
         return value
-    env_value: T = getattr(this, env_name, None)
+    # module attributes, so values assigned at runtime are honored.
+    env_value: T = globals().get(env_name, value)
     if env_value:
         return env_value
     raise ValueError(f"{env_name} is required but is not in env nor was a parameter")